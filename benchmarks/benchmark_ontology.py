@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+
+Benchmarks check_ontology with a large ontology: generates PeriodO dumps with 1k / 10k / 50k periods,
+loads them with load_periodo and times exact, fuzzy (typo), substring and no-match lookups.
+Also times the old linear scan over the whole ontology, for comparison.
+
+Usage:
+    python benchmarks/benchmark_ontology.py [number of periods ...]
+
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import editdistance
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import timeperiod2daterange
+
+
+# made up, but Dutch looking place names (Hamburgcultuur, Swifterbant)
+syllables = [onset + vowel + coda for onset in ['b', 'd', 'g', 'h', 'k', 'l', 'm', 'r', 'st', 'sw', 'v', 'w'] for vowel in ['a', 'e', 'i', 'o', 'u', 'ij', 'oe'] for coda in ['', 'k', 'l', 'n', 'rt']]
+
+
+# makes a PeriodO style json-ld dump with n periods with random names, returns the period names
+def make_dump(location, n):
+    random.seed(n)
+    names = set()
+    while len(names) < n:
+        names.add(''.join(random.choice(syllables) for i in range(random.randint(2, 4))) + random.choice(['cultuur', ' periode', 'ien', 'fase']))
+    names = sorted(names)
+    periods = {}
+    for i, name in enumerate(names):
+        start = random.randint(-10000, 1800)
+        periods['p%d' % i] = {
+            'id': 'p%d' % i,
+            'label': name,
+            'language': 'nld-latn',
+            'localizedLabels': {'nld-latn': [name], 'eng-latn': [name + ' culture']},
+            'spatialCoverage': [{'id': 'http://www.wikidata.org/entity/Q55', 'label': 'Netherlands'}],
+            'start': {'in': {'year': '%05d' % start}},
+            'stop': {'in': {'earliestYear': str(start + 100), 'latestYear': str(start + random.randint(100, 500))}},
+        }
+    with open(location, 'w', encoding='utf-8') as json_file:
+        json.dump({'authorities': {'a1': {'periods': periods}}}, json_file)
+    return names
+
+
+# the last resort of check_ontology before it was indexed: loop over all entries
+def linear_scan(string):
+    for ontPeriod, daterange in timeperiod2daterange.ontology.items():
+        if len(ontPeriod) > 4:
+            if ontPeriod in string or editdistance.eval(string, ontPeriod) < 3:
+                return daterange
+    return False
+
+
+# runs function on all strings, returns microseconds per string
+def time_per_call(function, strings):
+    start = time.perf_counter()
+    for string in strings:
+        function(string)
+    return (time.perf_counter() - start) / len(strings) * 1000000
+
+
+def run(n):
+    location = os.path.join(tempfile.mkdtemp(), 'periodo.json')
+    names = make_dump(location, n)
+
+    # start from the csv ontology each time
+    timeperiod2daterange.ontology = timeperiod2daterange.ontology2dict(os.path.join(os.path.dirname(timeperiod2daterange.__file__), timeperiod2daterange.ontologyLocation))
+    start = time.perf_counter()
+    timeperiod2daterange.load_periodo(location, ['Netherlands'], ['nld'])
+    loadTime = time.perf_counter() - start
+
+    sample = random.sample(names, 200)
+    queries = {
+        'exact': sample,
+        'fuzzy': [name[:3] + name[4:] for name in sample],
+        'substring': [name.replace(' ', '') + 'onderzoek' for name in sample],
+        'no match': ['qqq zzz %d' % i for i in range(200)],
+    }
+
+    print('%d periods, %d ontology entries, loaded in %.2f s' % (n, len(timeperiod2daterange.ontology), loadTime))
+    for category, strings in queries.items():
+        indexed = time_per_call(timeperiod2daterange.check_ontology, strings)
+        linear = time_per_call(linear_scan, strings[:20])
+        print('    %-10s check_ontology %8.1f us    linear scan %10.1f us' % (category, indexed, linear))
+
+
+if __name__ == '__main__':
+    for n in [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]:
+        run(n)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+
+Benchmarks check_ontology with a rule profile: records a profile on a sample of qualified periods that are resolved
+by the rules at the bottom of the default order (eerste helft van de bronstijd, laatste kwart van de ijzertijd,
+laat-romeinse, vroeg-romeinse), prints the rule order of the profile and the order load_rule_profile uses, and times
+the reference engine (the original check_ontology), the default rule order and the loaded profile on the rest of the sample.
+
+Usage:
+    python benchmarks/benchmark_rule_profile.py [number of inputs]
+
+"""
+
+import io
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import timeperiod2daterange
+import timeperiod2daterange_reference
+
+
+# qualified forms of an ontology period, per workload
+workloads = {
+    'helft/kwart': ['eerste helft van de %s', 'laatste helft van %s', 'eerste kwart van de %s', 'laatste kwart van %s'],
+    'late/vroege suffix': ['laat-%se', 'vroeg-%se', 'late %se', 'vroege %se'],
+}
+
+
+# runs check_ontology of the reference engine, with the default order and with rule order on all strings, takes turns so
+# they all get the same machine load. Returns microseconds per string (best of repeats) for each
+def time_per_call(strings, order, repeats = 5):
+    best = {}
+    for i in range(repeats):
+        for name, function, ruleOrder in [('reference', timeperiod2daterange_reference.check_ontology, timeperiod2daterange.ontology_rules),
+                                          ('default', timeperiod2daterange.check_ontology, timeperiod2daterange.ontology_rules),
+                                          ('profiled', timeperiod2daterange.check_ontology, order)]:
+            timeperiod2daterange.rule_order = ruleOrder
+            start = time.perf_counter()
+            for string in strings:
+                function(string)
+            seconds = time.perf_counter() - start
+            best[name] = min(best.get(name, seconds), seconds)
+    return {name: seconds / len(strings) * 1000000 for name, seconds in best.items()}
+
+
+def run(n, forms):
+    random.seed(n)
+    periods = [key for key in timeperiod2daterange.ontology if key.isalpha() and len(key) > 5]
+    strings = [random.choice(forms) % random.choice(periods) for i in range(n)]
+    sample, test = strings[:n//2], strings[n//2:]
+
+    timeperiod2daterange.reset_rule_order()
+    profile = timeperiod2daterange.record_rule_profile(sample)
+    location = os.path.join(tempfile.mkdtemp(), 'profile.json')
+    timeperiod2daterange.save_rule_profile(profile, location)
+    print('    hits: %s' % ', '.join('%s %d' % (name, count) for name, count in sorted(profile['counts'].items(), key=lambda item: -item[1])))
+    print('    order: %s' % ', '.join(profile['order']))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [timeperiod2daterange.check_ontology(string) for string in test]
+        used = timeperiod2daterange.load_rule_profile(location)
+        order = timeperiod2daterange.rule_order
+        same = results == [timeperiod2daterange.check_ontology(string) for string in test]
+        times = time_per_call(test, order)
+        timeperiod2daterange.reset_rule_order()
+
+    print('    used: %s' % ('default order' if order is timeperiod2daterange.ontology_rules else ', '.join(used)))
+    print('    reference %.2f us    default order %.2f us    profile %.2f us    same results: %s' % (times['reference'], times['default'], times['profiled'], same))
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name, forms in workloads.items():
+        print('%s, %d inputs' % (name, n))
+        run(n, forms)
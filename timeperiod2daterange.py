@@ -24,12 +24,23 @@ Author:
 
 import traceback
 import csv
+import json
 import re
 import datetime
 from nltk.util import ngrams
 import editdistance
 import os
 import sys
+import threading
+import asyncio
+import multiprocessing
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+try:
+    import numpy # optional, used for plain years/dates in detections2dateranges
+except ImportError:
+    numpy = None
 
 
 # OPTIONS ---------------------------------------------------
@@ -40,6 +51,29 @@ debug = 0
 # set location of ontology (csv format)
 ontologyLocation = 'ontologies/periodo_extended.csv'
 
+# optionally also load a local PeriodO dump (json-ld, from https://perio.do), only keeping periods with one of these
+# spatial coverages (e.g. ['Netherlands']) / label languages (e.g. ['nld', 'eng'] or ['nl', 'en']). None means keep all
+periodoLocation = None
+periodoSpatialCoverage = None
+periodoLanguages = None
+
+# if 1, precompute results of qualified ontology periods (late bronstijd, eerste helft van ijzertijd) at load, so they're 1 lookup.
+# Off by default: it adds 11 entries per ontology entry, which makes loading a large PeriodO dump several times slower
+precomputeQualifiedPeriods = 0
+
+# qualifier arithmetic (eerste helft, laatste kwart, late, vroege). 0: the results it has always given (see period_qualifier and
+# qualify_century), 1: the qualifier's fraction of the whole span of any range (see qualify_daterange). 1 changes results: qualified
+# ontology periods (laatste kwart van de middeleeuwen: [1612,1612] -> [1238,1500]) and qualified millennia (half is 500 years, not 50)
+qualifierSpanFractions = 0
+
+# optionally set location of a rule profile (json, see record_rule_profile), to try the check_ontology rules that resolve most strings first
+ruleProfileLocation = None
+
+# async API: executor type ('thread' or 'process'), number of workers, and max number of mentions being resolved at the same time
+asyncExecutorType = 'thread'
+asyncMaxWorkers = 4
+asyncMaxInFlight = 32
+
 # set current year
 now = datetime.datetime.now()
 currentYear = now.year
@@ -97,6 +131,29 @@ positiveTimewords = ['n. chr', 'na chr', ' ad ','n.chr.','n. chr.','na christus'
 
 extract_digits = re.compile('([0-9.,]+)')
 
+# 2 letter (ISO 639-1) and bibliographic 3 letter (ISO 639-2/B) language codes, to the 3 letter codes PeriodO uses ('nl' -> 'nld')
+language_codes = {
+    'nl':'nld', 'dut':'nld', 'en':'eng', 'de':'deu', 'ger':'deu', 'fr':'fra', 'fre':'fra', 'fy':'fry', 'lb':'ltz',
+    'it':'ita', 'es':'spa', 'pt':'por', 'ca':'cat', 'gl':'glg', 'eu':'eus', 'baq':'eus', 'la':'lat',
+    'da':'dan', 'sv':'swe', 'no':'nor', 'nb':'nob', 'nn':'nno', 'is':'isl', 'ice':'isl', 'fi':'fin', 'et':'est', 'lv':'lav', 'lt':'lit',
+    'ga':'gle', 'cy':'cym', 'wel':'cym', 'gd':'gla',
+    'pl':'pol', 'cs':'ces', 'cze':'ces', 'sk':'slk', 'slo':'slk', 'sl':'slv', 'hr':'hrv', 'sr':'srp', 'bs':'bos', 'bg':'bul',
+    'mk':'mkd', 'mac':'mkd', 'ro':'ron', 'rum':'ron', 'hu':'hun', 'el':'ell', 'gre':'ell', 'sq':'sqi', 'alb':'sqi',
+    'ru':'rus', 'uk':'ukr', 'be':'bel', 'tr':'tur', 'hy':'hye', 'arm':'hye', 'ka':'kat', 'geo':'kat',
+    'ar':'ara', 'he':'heb', 'fa':'fas', 'per':'fas', 'zh':'zho', 'chi':'zho', 'ja':'jpn', 'ko':'kor', 'hi':'hin',
+}
+
+# whole (lowercased) strings that detections2dateranges resolves without the full parser: year (1990, -1800), digits with spaces (1 900),
+# year with brackets (350 (?), (350)), full date (18-03-2005), year + v./n. chr (300 v. chr.). Max 15 digits, so they fit in an int64
+batch_fast_path = re.compile(r'''
+    -*(?P<year>[0-9]{1,15})-*
+    | (?P<spaced>\ *[0-9][0-9\ ]*)
+    | (?P<uncertain>[0-9]{1,15})\ ?\(\?\)
+    | \((?P<bracketed>[0-9]{1,15})\)
+    | [0-9]{1,2}[/.-][0-9]{1,2}[/.-](?P<date>[0-9]{2,4})
+    | (?P<era>[0-9]{1,15})\ ?(?:v\.\ ?chr\.?|v\ chr\.?|voor\ chr\.?|voor\ christus|n\.\ ?chr\.?|n\ chr\.?|na\ chr\.?|na\ christus|bc)
+''', re.VERBOSE)
+
 comboWords = [
     ' en/of ',
     ' en / of ', 
@@ -123,6 +180,47 @@ comboWords = [
 ]
 comboRegexpString = '|'.join(comboWords)
 
+# qualifiers, with the part of the span of a period/century they refer to: (start fraction, end fraction)
+qualifier_spans = {
+    'eerste helft': (0, 0.5),
+    'laatste helft': (0.5, 1),
+    'eerste kwart': (0, 0.25),
+    'tweede kwart': (0.25, 0.5),
+    'derde kwart': (0.5, 0.75),
+    'laatste kwart': (0.75, 1),
+    'midden': (0.25, 0.75),
+}
+
+# words for qualifiers of a century/millennium, if more than 1 qualifier occurs, the first one in this list wins
+century_qualifiers = [
+    ('eerste helft', ['eerste helft ', '1e helft ']),
+    ('laatste helft', ['laatste helft ', 'tweede helft ', '2e helft ']),
+    ('eerste kwart', ['eerste kwart ', '1e kwart ', '1ste kwart ', 'begin van ', 'begin ', 'vroege ']),
+    ('tweede kwart', ['tweede kwart ', '2e kwart ']),
+    ('derde kwart', ['derde kwart ', '3e kwart ']),
+    ('laatste kwart', ['laatste kwart ', 'einde van ', 'eind ', 'late ']),
+    ('midden', ['midden van ']),
+]
+# the same as 1 list of words in that order, and the qualifier of each word (a flat loop over these is the cheapest check)
+century_qualifier_words = [word for qualifier, words in century_qualifiers for word in words]
+century_qualifier_by_word = {word: qualifier for qualifier, words in century_qualifiers for word in words}
+
+# qualifier rules of check_ontology: (rule name, take off last char first, words removed from the string, qualifier)
+ontology_qualifiers = [
+    ('late', False, ['late ','laat ','laat-'], 'laatste helft'), # late / laat (laat pleniglaciaal)
+    ('late suffix', True, ['late ','laat ','laat-'], 'laatste helft'), # late / laat and sort 's' and 'e' (laat-romeinse)
+    ('vroege', False, ['vroege ','vroeg ','vroeg-'], 'eerste helft'), # vroege / vroeg
+    ('vroege suffix', True, ['vroege ','vroeg ','vroeg-'], 'eerste helft'), # vroege / vroeg and sort 's' and 'e' (vroeg-romeinse)
+    ('eerste helft', False, ['eerste helft ','1e helft ','de ','het ','van '], 'eerste helft'),
+    ('laatste helft', False, ['laatste helft ','de ','het ','van '], 'laatste helft'),
+    ('tweede helft', False, ['tweede helft ','de ','het ','van '], 'laatste helft'),
+    ('eerste kwart', False, ['eerste kwart ','1e kwart ','de ','het ','van '], 'eerste kwart'),
+    ('laatste kwart', False, ['laatste kwart ','de ','het ','van '], 'laatste kwart'),
+]
+
+# qualified forms of every ontology period that are precomputed (see precomputeQualifiedPeriods), after check_ontology cleaning ('van de' -> 'van')
+qualified_period_prefixes = ['late ', 'laat ', 'laat-', 'vroege ', 'vroeg ', 'vroeg-', 'eerste helft van ', 'laatste helft van ', 'tweede helft van ', 'eerste kwart van ', 'laatste kwart van ']
+
 
 
 # DEFINE FUNCTIONS ---------------------------------------------------
@@ -134,16 +232,307 @@ def ontology2dict(location):
         csv_reader = csv.reader(csv_file, delimiter=',')
         next(csv_reader, None)  # skip the headers
         for row in csv_reader:
-            output[row[1].lower()] = [int(row[2]),int(row[3])]
-            output[row[1].lower().replace(' ','')] = [int(row[2]),int(row[3])] # add version without spaces, to counteract ocr errors
+            daterange = [int(row[2]),int(row[3])] # all names of a period share the same list
+            output[row[1].lower()] = daterange
+            output[row[1].lower().replace(' ','')] = daterange # add version without spaces, to counteract ocr errors
             for i in range(4,17):
                 if row[i]:
-                    output[row[i].lower()] = [int(row[2]),int(row[3])]
-                    output[row[i].lower().replace(' ','')] = [int(row[2]),int(row[3])] # add version without spaces, to counteract ocr errors
+                    output[row[i].lower()] = daterange
+                    output[row[i].lower().replace(' ','')] = daterange # add version without spaces, to counteract ocr errors
         return output
 
+
+# gets year from PeriodO start/stop, e.g. {'in': {'year': '-0799'}} or {'in': {'earliestYear': '-0800', 'latestYear': '-0750'}}
+def periodo_year(terminus, which):
+    if not terminus or 'in' not in terminus:
+        return None
+    year = terminus['in'].get('year', terminus['in'].get(which))
+    if year is None or year == '':
+        return None
+    return int(year)
+
+
+# returns the language of a language tag as a 3 letter code, script/region are left out ('nl', 'nld', 'nld-latn', 'nl-BE' -> 'nld')
+def periodo_language(tag):
+    language = tag.lower().replace('_','-').split('-')[0]
+    return language_codes.get(language, language)
+
+
+# checks if PeriodO language tag (e.g. 'nld-latn') is in the list of languages (3 letter codes, see periodo_language)
+def periodo_language_match(tag, languages):
+    if not tag:
+        return False
+    return periodo_language(tag) in languages
+
+
+# turns local PeriodO dump (json-ld) into dict {'period name':[startdate,enddate],...}, same format as ontology2dict.
+# spatialCoverage: list of place names / wikidata ids, languages: list of language tags (2 or 3 letter, 'nl' and 'nld' are the same),
+# periods or labels not matching are skipped
+def periodo2dict(location, spatialCoverage = None, languages = None):
+    if spatialCoverage:
+        spatialCoverage = [place.lower() for place in spatialCoverage]
+    if languages:
+        languages = [periodo_language(language) for language in languages]
+    
+    with open(location, encoding="utf-8") as json_file:
+        dump = json.load(json_file)
+    
+    output = {}
+    for authority in dump.get('authorities', {}).values():
+        for period in authority.get('periods', {}).values():
+            
+            # only periods in one of the given places
+            if spatialCoverage:
+                places = [place.get(field, '').lower() for place in period.get('spatialCoverage', []) for field in ('id', 'label')]
+                places += [place.split('/')[-1] for place in places] # also match 'Q55' to 'http://www.wikidata.org/entity/Q55'
+                places.append(period.get('spatialCoverageDescription', '').lower())
+                if not any(place in places for place in spatialCoverage):
+                    continue
+            
+            startdate = periodo_year(period.get('start'), 'earliestYear')
+            enddate = periodo_year(period.get('stop'), 'latestYear')
+            if startdate is None or enddate is None:
+                continue
+            
+            # main label (language is 'language' in newer dumps, 'languageTag' in older ones) + localized labels
+            labels = []
+            if not languages or periodo_language_match(period.get('language', period.get('languageTag')), languages):
+                labels.append(period.get('label', ''))
+            for tag, localizedLabels in period.get('localizedLabels', {}).items():
+                if not languages or periodo_language_match(tag, languages):
+                    labels += localizedLabels
+            
+            daterange = [startdate,enddate]
+            for label in labels:
+                label = label.lower().strip()
+                if label:
+                    output.setdefault(label, daterange) # first period with this name wins
+                    output.setdefault(label.replace(' ',''), daterange) # add version without spaces, to counteract ocr errors
+    return output
+
+
+# splits length of a string into 4 parts, returns [(start,end),...]. If the edit distance between 2 strings is < 3,
+# at least 2 of the 4 parts are unchanged in the other string, each shifted by at most 2 characters
+def segment_bounds(length):
+    return [(length*i//4, length*(i+1)//4) for i in range(4)]
+
+# pairs of parts (i,j) and the shifts of part i and j that are possible with at most 2 insertions/deletions
+segment_pairs = [(i, j) for i in range(4) for j in range(i+1, 4)]
+segment_shifts = [(shift, shift2) for shift in range(-2,3) for shift2 in range(-2,3) if abs(shift) + abs(shift2-shift) <= 2]
+
+
+# indexes the ontology for the last resort matching in check_ontology, so it doesn't have to loop over all entries
+# (substring: lookup of every substring, edit distance: lookup of pairs of unchanged parts, see segment_bounds).
+# Also keeps the ontology and its size, to notice it was replaced or changed later (see ontology_changed)
+def index_ontology(ontology):
+    index = {'keys':[], 'positions':{}, 'segments':{}, 'maxLength':0, 'ontology':ontology, 'size':len(ontology)}
+    for key in ontology:
+        if len(key) > 4: # this is to leave out ABR codes such as 'NT' which will occur in a lot of words
+            position = len(index['keys'])
+            index['keys'].append(key)
+            index['positions'][key] = position
+            index['maxLength'] = max(index['maxLength'], len(key))
+            bounds = segment_bounds(len(key))
+            for i, j in segment_pairs:
+                segments = (i, j, len(key), key[bounds[i][0]:bounds[i][1]], key[bounds[j][0]:bounds[j][1]])
+                index['segments'].setdefault(segments, []).append(position)
+    return index
+
+
+# returns True if the ontology was replaced, or entries were added or removed, since it was last indexed (see reindex_ontology)
+def ontology_changed():
+    return ontology_index['ontology'] is not ontology or ontology_index['size'] != len(ontology)
+
+
+# returns first ontology entry (in ontology order) that occurs in string, or if fuzzy, has an edit distance < 3 to string
+def search_ontology_index(string, fuzzy = True):
+    if ontology_changed():
+        reindex_ontology()
+    index = ontology_index
+    best = None
+    
+    # every substring of the string that's long enough
+    for start in range(len(string)):
+        for end in range(start+5, min(len(string), start+index['maxLength'])+1):
+            position = index['positions'].get(string[start:end])
+            if position is not None and (best is None or position < best):
+                best = position
+    
+    # entries of similar length that have 2 of their 4 parts in the right place in string, then check edit distance
+    if fuzzy:
+        checked = set() # an entry can share more than 1 pair of parts with string
+        for length in range(max(5, len(string)-2), len(string)+3):
+            bounds = segment_bounds(length)
+            for i, j in segment_pairs:
+                for shift, shift2 in segment_shifts:
+                    if bounds[i][0]+shift < 0 or bounds[j][1]+shift2 > len(string):
+                        continue
+                    segments = (i, j, length, string[bounds[i][0]+shift:bounds[i][1]+shift], string[bounds[j][0]+shift2:bounds[j][1]+shift2])
+                    for position in index['segments'].get(segments, []):
+                        if best is not None and position >= best: # positions are sorted, the rest can't be better
+                            break
+                        if position not in checked:
+                            checked.add(position)
+                            if editdistance.eval(string, index['keys'][position]) < 3:
+                                best = position
+    
+    if best is None:
+        return False
+    return ontology[index['keys'][best]]
+
+
+# adds periods from a local PeriodO dump to the ontology (periods already in the ontology are kept as they are)
+def load_periodo(location, spatialCoverage = None, languages = None):
+    for key, daterange in periodo2dict(location, spatialCoverage, languages).items():
+        ontology.setdefault(key, daterange)
+    reindex_ontology()
+
+
+
+# turn ontology daterange into result of a rule in check_ontology
+def whole_period(dates):
+    return dates
+
+
+# applies qualifier to [startdate,enddate] of a century/millennium the way parse_century always has: fractions of 100 years,
+# also for millennia. Offsets per qualifier are in century_qualifier_offsets
+def qualify_century(qualifier, startdate, enddate):
+    startOffset, endOffset = century_qualifier_offsets[qualifier]
+    return [startdate + startOffset, enddate - endOffset]
+
+century_qualifier_offsets = {qualifier: (round(startFraction*100), round((1-endFraction)*100)) for qualifier, (startFraction, endFraction) in qualifier_spans.items()}
+
+
+# applies qualifier to any daterange (ontology period, century, millennium), returns the part of the span it refers to.
+# Both years are part of the range, so [100,199] is 100 years: eerste helft = [100,149], laatste helft = [150,199].
+# Only used if qualifierSpanFractions is set
+def qualify_daterange(qualifier, dates):
+    startFraction, endFraction = qualifier_spans[qualifier]
+    years = dates[1] - dates[0] + 1
+    startdate = min(dates[0] + round(years*startFraction), dates[1])
+    enddate = max(dates[0] + round(years*endFraction) - 1, startdate) # at least 1 year, for very short periods
+    return [startdate,enddate]
+
+
+# returns the qualifier of a century/millennium string (eerste helft van de 2e eeuw -> 'eerste helft'), or False
+def find_century_qualifier(timeperiod):
+    # plain substring checks, cheaper than a regex search over all the words (most centuries have no qualifier)
+    for word in century_qualifier_words:
+        if word in timeperiod:
+            return century_qualifier_by_word[word]
+    return False
+
+
+# returns function for a check_ontology rule that removes the words from a string
+def word_remover(words):
+    def remove_words(string):
+        for word in words:
+            string = string.replace(word,'')
+        return string
+    return remove_words
+
+
+# returns function for a check_ontology rule that applies qualifier to the ontology daterange, the way check_ontology always has:
+# d0+d1-d0*fraction, which is not the fraction of the span (can even give start > end, postCorrectDates then keeps the startdate).
+# Kept so results don't change, qualifierSpanFractions gives the fraction of the span (see qualify_daterange)
+def period_qualifier(qualifier):
+    startFraction, endFraction = qualifier_spans[qualifier]
+    def qualify(dates):
+        if qualifierSpanFractions:
+            return qualify_daterange(qualifier, dates)
+        startdate = dates[0] if startFraction == 0 else round(dates[0]+dates[1]-dates[0]*startFraction)
+        enddate = dates[1] if endFraction == 1 else round(dates[0]+dates[1]-dates[0]*endFraction)
+        return [startdate,enddate]
+    return qualify
+
+
+# rules of check_ontology: (name, take off last char first, function that normalises the string to an ontology key, function that
+# makes the result from that key's daterange, text the string has to contain for the normalise function to change anything or None).
+# The first rule that gives a key in the ontology wins. A rule with a normalise function is skipped if it doesn't change anything,
+# that key is already covered by the 'exact' and 'suffix' rules. The text is only there so check_ontology can skip a rule without
+# calling its normalise function
+ontology_rules = [
+    ('exact', False, None, whole_period, None),
+    # take off last char to sort 's' and 'e' (prehistorische, middeleeuws)
+    ('suffix', True, None, whole_period, None),
+    # take off ' periode' (jonge dryas periode)
+    ('periode', False, lambda string: string.replace(' periode',''), whole_period, ' periode'),
+    # remove ' periode' and sort 's' and 'e' (middeleeuwse periode)
+    ('periode suffix', True, lambda string: string.replace(' periode',''), whole_period, ' periode'),
+    # remove dashes and strip whitespace (- middeleeuwen)
+    ('dash strip', False, lambda string: string.replace('-','').strip(), whole_period, '-'),
+    # replace dash with space (midden-romeinse tijd -> midden romeinse tijd)
+    ('dash space', False, lambda string: string.replace('-',' '), whole_period, '-'),
+    # remove dash  (swifterband-cultuur -> swifterbantcultuur)
+    ('dash remove', False, lambda string: string.replace('-',''), whole_period, '-'),
+    # remove brackets, dashes, and resulting extra whitespace  ((sub-)recent)
+    ('brackets', False, lambda string: string.replace('(','').replace(')','').replace('-','').replace('  ',' ').strip(), whole_period, None),
+    # remove brackets, dashes, resulting extra whitespace and last 'e'  ((pre-)historische)
+    ('brackets suffix', True, lambda string: string.replace('(','').replace(')','').replace('-','').replace('  ',' ').strip(), whole_period, None),
+]
+
+# {'qualifier':function that applies it to an ontology daterange}
+period_qualifiers = {qualifier: period_qualifier(qualifier) for qualifier in qualifier_spans}
+
+# qualifier rules (see ontology_qualifiers), every word of a rule starts with the common prefix of its words
+ontology_rules += [(name, takeOffLastChar, word_remover(words), period_qualifiers[qualifier], os.path.commonprefix(words) or None) for name, takeOffLastChar, words, qualifier in ontology_qualifiers]
+
+
+# returns the ontology key rule gives for string, or False if the rule doesn't apply
+def rule_key(rule, string):
+    name, takeOffLastChar, normalise, transform, trigger = rule
+    if takeOffLastChar:
+        string = string[:-1]
+    if normalise is None:
+        return string
+    key = normalise(string)
+    if key == string:
+        return False
+    return key
+
+# order in which check_ontology tries the rules, can be changed with a rule profile (see RULE PROFILE below). Is ontology_rules
+# itself for the default order, check_ontology then uses its written out version of the rules
+rule_order = ontology_rules
+
+# when recording a rule profile, per thread (see start_rule_recording): counts {'rule name':number of hits}, inputs (the strings
+# the rules were tried on) and order (the rule order used while recording)
+rule_recording = threading.local()
+
+# number of threads recording, so check_ontology only looks at rule_recording (slow, it's thread-local) while anyone records
+rule_recording_threads = 0
+rule_recording_lock = threading.Lock()
+
+
+# runs the rules on the qualified forms of every ontology period, returns {'qualified period':(rule name, [startdate,enddate])}
+def precompute_qualified_periods(ontology):
+    output = {}
+    for key in ontology:
+        for prefix in qualified_period_prefixes:
+            string = prefix + key
+            for rule in ontology_rules:
+                ruleKey = rule_key(rule, string)
+                if ruleKey is not False and ruleKey in ontology:
+                    output[string] = (rule[0], rule[3](ontology[ruleKey]))
+                    break
+    return output
+
+
+# rebuilds everything made from the ontology (index of the last resort matching, precomputed qualified periods).
+# Call after changing the ontology, precomputeQualifiedPeriods or qualifierSpanFractions. Replacing the ontology, or adding
+# or removing entries, is noticed and rebuilt on the next last resort match; changing the daterange of an entry isn't
+def reindex_ontology():
+    global ontology_index, qualified_periods
+    ontology_index = index_ontology(ontology)
+    qualified_periods = precompute_qualified_periods(ontology) if precomputeQualifiedPeriods else {}
+
+
 # get ontology
 ontology = ontology2dict(ontologyLocation)
+if periodoLocation:
+    load_periodo(periodoLocation, periodoSpatialCoverage, periodoLanguages)
+else:
+    reindex_ontology()
+
 
 # checks if string is a defined time period, or very similar to one, returns [startdate,enddate] or False if no match     
 def check_ontology(string, do_ngrams = True):
@@ -158,88 +547,132 @@ def check_ontology(string, do_ngrams = True):
     if debug:
         print('String is: '+string)
 
-    if string in ontology:
-        return ontology[string]
-    
-    # take off last char to sort 's' and 'e' (prehistorische, middeleeuws)
-    elif string[:-1] in ontology: 
-        return ontology[string[:-1]]
-    
-    # take off ' periode' (jonge dryas periode)
-    elif string.replace(' periode','') in ontology: 
-        return ontology[string.replace(' periode','')]
-    
-    # remove ' periode' and sort 's' and 'e' (middeleeuwse periode)
-    elif string[:-1].replace(' periode','') in ontology: 
-        return ontology[string[:-1].replace(' periode','')]
+    # default order and nobody recording: the normalisation rules of ontology_rules written out, a chain of checks is a lot faster
+    # than looping over the rules. Keep this the same as ontology_rules
+    if rule_order is ontology_rules and not rule_recording_threads:
     
-    # remove dashes and strip whitespace (- middeleeuwen)
-    elif string.replace('-','').strip() in ontology: 
-        return ontology[string.replace('-','').strip()]
-    
-    # replace dash with space (midden-romeinse tijd -> midden romeinse tijd)
-    elif string.replace('-',' ') in ontology: 
-        return ontology[string.replace('-',' ')]
-    
-    # remove dash  (swifterband-cultuur -> swifterbantcultuur)
-    elif string.replace('-','') in ontology: 
-        return ontology[string.replace('-','')]
-    
-    # remove brackets, dashes, and resulting extra whitespace  ((sub-)recent)
-    elif string.replace('(','').replace(')','').replace('-','').replace('  ',' ').strip() in ontology: 
-        return ontology[string.replace('(','').replace(')','').replace('-','').replace('  ',' ').strip()]
+        if string in ontology:
+            return ontology[string]
+        
+        # qualified period (late bronstijd), precomputed
+        if string in qualified_periods and not ontology_changed():
+            return list(qualified_periods[string][1])
+        
+        # take off last char to sort 's' and 'e' (prehistorische, middeleeuws)
+        key = string[:-1]
+        if key in ontology:
+            return ontology[key]
+        
+        # take off ' periode' (jonge dryas periode)
+        key = string.replace(' periode','')
+        if key in ontology:
+            return ontology[key]
+        
+        # remove ' periode' and sort 's' and 'e' (middeleeuwse periode)
+        key = string[:-1].replace(' periode','')
+        if key in ontology:
+            return ontology[key]
+        
+        # remove dashes and strip whitespace (- middeleeuwen)
+        key = string.replace('-','').strip()
+        if key in ontology:
+            return ontology[key]
+        
+        # replace dash with space (midden-romeinse tijd -> midden romeinse tijd)
+        key = string.replace('-',' ')
+        if key in ontology:
+            return ontology[key]
+        
+        # remove dash  (swifterband-cultuur -> swifterbantcultuur)
+        key = string.replace('-','')
+        if key in ontology:
+            return ontology[key]
+        
+        # remove brackets, dashes, and resulting extra whitespace  ((sub-)recent)
+        key = string.replace('(','').replace(')','').replace('-','').replace('  ',' ').strip()
+        if key in ontology:
+            return ontology[key]
+        
+        # remove brackets, dashes, resulting extra whitespace and last 'e'  ((pre-)historische)
+        key = string[:-1].replace('(','').replace(')','').replace('-','').replace('  ',' ').strip()
+        if key in ontology:
+            return ontology[key]
+        
+        # late / laat (laat pleniglaciaal)
+        key = string.replace('late ','').replace('laat ','').replace('laat-','')
+        if key in ontology:
+            return period_qualifiers['laatste helft'](ontology[key])
+        
+        # late / laat and sort 's' and 'e' (laat-romeinse)
+        key = string[:-1].replace('late ','').replace('laat ','').replace('laat-','')
+        if key in ontology:
+            return period_qualifiers['laatste helft'](ontology[key])
+        
+        # vroege / vroeg 
+        key = string.replace('vroege ','').replace('vroeg ','').replace('vroeg-','')
+        if key in ontology:
+            return period_qualifiers['eerste helft'](ontology[key])
+        
+        # vroege / vroeg and sort 's' and 'e' (vroeg-romeinse)
+        key = string[:-1].replace('vroege ','').replace('vroeg ','').replace('vroeg-','')
+        if key in ontology:
+            return period_qualifiers['eerste helft'](ontology[key])
+        
+        # eerste helft
+        key = string.replace('eerste helft ','').replace('1e helft ','').replace('de ','').replace('het ','').replace('van ','')
+        if key in ontology:
+            return period_qualifiers['eerste helft'](ontology[key])
+        
+        # laatste helft
+        key = string.replace('laatste helft ','').replace('de ','').replace('het ','').replace('van ','')
+        if key in ontology:
+            return period_qualifiers['laatste helft'](ontology[key])
+        
+        # tweede helft
+        key = string.replace('tweede helft ','').replace('de ','').replace('het ','').replace('van ','')
+        if key in ontology:
+            return period_qualifiers['laatste helft'](ontology[key])
+        
+        # eerste kwart
+        key = string.replace('eerste kwart ','').replace('1e kwart ','').replace('de ','').replace('het ','').replace('van ','')
+        if key in ontology:
+            return period_qualifiers['eerste kwart'](ontology[key])
+        
+        # laatste kwart
+        key = string.replace('laatste kwart ','').replace('de ','').replace('het ','').replace('van ','')
+        if key in ontology:
+            return period_qualifiers['laatste kwart'](ontology[key])
     
-    # remove brackets, dashes, resulting extra whitespace and last 'e'  ((pre-)historische)
-    elif string[:-1].replace('(','').replace(')','').replace('-','').replace('  ',' ').strip() in ontology: 
-        return ontology[string[:-1].replace('(','').replace(')','').replace('-','').replace('  ',' ').strip()]
-    
-    # late / laat (laat pleniglaciaal)
-    elif string.replace('late ','').replace('laat ','').replace('laat-','') in ontology: 
-        dates = ontology[string.replace('late ','').replace('laat ','').replace('laat-','')]
-        return [round(dates[0]+dates[1]-dates[0]/2),dates[1]]
-    
-    # late / laat and sort 's' and 'e' (laat-romeinse)
-    elif string[:-1].replace('late ','').replace('laat ','').replace('laat-','') in ontology: 
-        dates = ontology[string[:-1].replace('late ','').replace('laat ','').replace('laat-','')]
-        return [round(dates[0]+dates[1]-dates[0]/2),dates[1]]
-    
-    # vroege / vroeg 
-    elif string.replace('vroege ','').replace('vroeg ','').replace('vroeg-','') in ontology: 
-        dates = ontology[string.replace('vroege ','').replace('vroeg ','').replace('vroeg-','')]
-        return [dates[0],round(dates[0]+dates[1]-dates[0]/2)]
-    
-    # vroege / vroeg and sort 's' and 'e' (vroeg-romeinse)
-    elif string[:-1].replace('vroege ','').replace('vroeg ','').replace('vroeg-','') in ontology: 
-        dates = ontology[string[:-1].replace('vroege ','').replace('vroeg ','').replace('vroeg-','')]
-        return [dates[0],round(dates[0]+dates[1]-dates[0]/2)]
-    
-    # eerste helft
-    elif string.replace('eerste helft ','').replace('1e helft ','').replace('de ','').replace('het ','').replace('van ','') in ontology: 
-        dates = ontology[string.replace('eerste helft ','').replace('1e helft ','').replace('de ','').replace('het ','').replace('van ','')]
-        return [dates[0],round(dates[0]+dates[1]-dates[0]/2)]
-    
-    # laatste helft
-    elif string.replace('laatste helft ','').replace('de ','').replace('het ','').replace('van ','') in ontology: 
-        dates = ontology[string.replace('laatste helft ','').replace('de ','').replace('het ','').replace('van ','')]
-        return [round(dates[0]+dates[1]-dates[0]/2),dates[1]]
-    
-    # tweede helft
-    elif string.replace('tweede helft ','').replace('de ','').replace('het ','').replace('van ','') in ontology: 
-        dates = ontology[string.replace('tweede helft ','').replace('de ','').replace('het ','').replace('van ','')]
-        return [round(dates[0]+dates[1]-dates[0]/2),dates[1]]
-    
-    # eerste kwart
-    elif string.replace('eerste kwart ','').replace('1e kwart ','').replace('de ','').replace('het ','').replace('van ','') in ontology: 
-        dates = ontology[string.replace('eerste kwart ','').replace('1e kwart ','').replace('de ','').replace('het ','').replace('van ','')]
-        return [dates[0],round(dates[0]+dates[1]-dates[0]*0.25)]
-    
-    # laatste kwart
-    elif string.replace('laatste kwart ','').replace('de ','').replace('het ','').replace('van ','') in ontology: 
-        dates = ontology[string.replace('laatste kwart ','').replace('de ','').replace('het ','').replace('van ','')]
-        return [round(dates[0]+dates[1]-dates[0]*0.75),dates[1]]
+    # order of a loaded rule profile, or recording: try the rules (see ontology_rules) one by one.
+    # Same as rule_key, written out because this runs for every string
+    else:
+        counts = getattr(rule_recording, 'counts', None)
+        
+        # qualified period (late bronstijd), precomputed
+        if string in qualified_periods and not ontology_changed():
+            name, daterange = qualified_periods[string]
+            if counts is not None:
+                counts[name] = counts.get(name, 0) + 1
+                rule_recording.inputs.append(string)
+            return list(daterange)
+        
+        for name, takeOffLastChar, normalise, transform, trigger in rule_order if counts is None else rule_recording.order:
+            if trigger is not None and trigger not in string:
+                continue
+            key = string[:-1] if takeOffLastChar else string
+            if normalise is not None:
+                normalised = normalise(key)
+                if normalised == key:
+                    continue
+                key = normalised
+            if key in ontology:
+                if counts is not None:
+                    counts[name] = counts.get(name, 0) + 1
+                    rule_recording.inputs.append(string)
+                return transform(ontology[key])
     
     # try splitting in 2 on dash, and do each one seperately (bronstijd-ijzertijd)
-    elif '-' in string:
+    if '-' in string:
         strings = string.split('-')
         startdate = check_ontology(strings[0])
         if startdate:
@@ -274,25 +707,9 @@ def check_ontology(string, do_ngrams = True):
             
     
     # last resort, check if any time periods occur in the timeperiod string (Bronstijdonderzoek) and do edit distance
-    for ontPeriod, daterange in ontology.items():
-        #print(ontPeriod+' '+string)
-        if len(ontPeriod) > 4: # this is to leave out ABR codes such as 'NT' which will occur in a lot of words
-            if ontPeriod in string:
-                return daterange
-
-            # also calculate edit distance between each ngram and the ontology entry, if low, return the daterange (middeleewen)
-            elif 'token_ngrams' in locals():
-                for token_ngram in token_ngrams:
-                    token_ngram_temp = ' '.join(token_ngram)
-                    if editdistance.eval(token_ngram_temp, ontPeriod) < 3:
-                        return daterange
-            # or if no ngrams, do edit distance for whole string
-            else:
-                if editdistance.eval(string, ontPeriod) < 3:
-                    return daterange
-    
-    # can't find any match :( return False
-    return False
+    # for whole string (middeleewen). If ngrams were made above, they've all been checked already, so no edit distance
+    # can't find any match :( returns False
+    return search_ontology_index(string, fuzzy = 'token_ngrams' not in locals())
     
  
 def parse_century(timeperiod):
@@ -345,29 +762,12 @@ def parse_century(timeperiod):
 
 
         # check quantifiers (eerste helft, midden van, laatste kwart)
-        if 'eerste helft ' in timeperiod or '1e helft ' in timeperiod: 
-            enddate = enddate-50
-
-        elif 'laatste helft ' in timeperiod or 'tweede helft ' in timeperiod or '2e helft ' in timeperiod: 
-            startdate = startdate+50
-
-        elif 'eerste kwart ' in timeperiod or '1e kwart ' in timeperiod or '1ste kwart ' in timeperiod or 'begin van ' in timeperiod  or 'begin ' in timeperiod or 'vroege ' in timeperiod: 
-            enddate = enddate-75
-
-        elif 'tweede kwart ' in timeperiod or '2e kwart ' in timeperiod: 
-            startdate = startdate+25
-            enddate = enddate-50
-
-        elif 'derde kwart ' in timeperiod or '3e kwart ' in timeperiod: 
-            startdate = startdate+50
-            enddate = enddate-25
-
-        elif 'laatste kwart ' in timeperiod or 'einde van ' in timeperiod or 'eind ' in timeperiod or 'late ' in timeperiod: 
-            startdate = startdate+75
-
-        elif 'midden van ' in timeperiod: # 2e eeuw = 100 - 200
-            startdate=startdate+25
-            enddate=enddate-25
+        qualifier = find_century_qualifier(timeperiod)
+        if qualifier:
+            if qualifierSpanFractions:
+                startdate, enddate = qualify_daterange(qualifier, [startdate,enddate])
+            else:
+                startdate, enddate = qualify_century(qualifier, startdate, enddate)
 
 
         # if BC, make dates negative and swap start and end date
@@ -752,8 +1152,355 @@ def postCorrectDates(startdate,enddate,multiDates = False):
     return [startdate,enddate]
 
 
-# run argument, if provided from command line
-if len(sys.argv) > 1:
+
+# BATCH ---------------------------------------------------
+
+# same as postCorrectDates, but for numpy arrays of startdates and enddates (multiDates can be an array too), returns (startdates, enddates)
+def postCorrectDatesArray(startdates, enddates, multiDates = False):
+    
+    # dates in the future are BC
+    startdates = numpy.where(startdates > currentYear, startdates * -1, startdates)
+    enddates = numpy.where((enddates > currentYear) & (enddates != 2099), enddates * -1, enddates)
+    
+    # enddate before startdate: startdate is also BC / both are BC (multidate, small difference) / just use the startdate
+    reversed = enddates < startdates
+    startIsBC = reversed & (enddates < 0) & (startdates > 0) & (startdates * -1 < enddates)
+    bothBC = reversed & ~startIsBC & multiDates & (startdates - enddates < 400)
+    useStartdate = reversed & ~startIsBC & ~bothBC
+    
+    return numpy.where(startIsBC | bothBC, startdates * -1, startdates), numpy.where(bothBC, enddates * -1, numpy.where(useStartdate, startdates, enddates))
+
+
+# takes list of timeperiod strings, returns list of [startdate,enddate] (or False) in the same order, same results as detection2daterange.
+# Plain years and dates (see batch_fast_path) are converted together with numpy, the rest goes through detection2daterange one by one
+def detections2dateranges(timeperiods):
+    timeperiods = list(timeperiods)
+    dateranges = [False] * len(timeperiods)
+    
+    # sort out the fast path inputs: index, digits, BC or not, 2 digit year from date
+    indices, years, isBC, isShortYear = [], [], [], []
+    for i, timeperiod in enumerate(timeperiods):
+        match = batch_fast_path.fullmatch(timeperiod.lower()) if numpy is not None and type(timeperiod) == str else None
+        if match:
+            category = match.lastgroup
+            digits = match.group(category).replace(' ','')
+            if len(digits) <= 15:
+                indices.append(i)
+                years.append(digits)
+                isBC.append(category == 'era' and checkTimeType(timeperiod) == 'BC') # same as the full parser, 'v.chr' without last '.' isn't BC
+                isShortYear.append(category == 'date' and len(digits) == 2)
+                continue
+        dateranges[i] = detection2daterange(timeperiod)
+    
+    if debug:
+        print(str(len(indices)) + ' of ' + str(len(timeperiods)) + ' on fast path')
+    
+    if indices:
+        years = numpy.array(years).astype(numpy.int64)
+        
+        # shortened version of year (18-3-99), > 25 is 20th century, else 21st
+        isShortYear = numpy.array(isShortYear)
+        years = numpy.where(isShortYear, numpy.where(years > 25, years + 1900, years + 2000), years)
+        years = numpy.where(numpy.array(isBC), years * -1, years)
+        
+        startdates, enddates = postCorrectDatesArray(years, years)
+        for i, startdate, enddate in zip(indices, startdates.tolist(), enddates.tolist()):
+            dateranges[i] = [startdate,enddate]
+    
+    return dateranges
+
+
+
+# RULE PROFILE ---------------------------------------------------
+
+# check_ontology tries its rules in a fixed order, so a hit on one of the last rules first pays for all failed rules before it.
+# A rule profile records which rules resolve the strings of a sample workload, so later runs can try the most used rules first.
+# Two rules only swap places if they never give a different result for the same string (on the sample, and on variants
+# of every ontology entry), so those strings still get the same result as with the default order. Strings unlike any of them
+# aren't checked, a wider sample makes that less likely to matter
+
+# prefixes and suffixes that make variants of ontology entries that more than 1 rule can resolve
+probe_prefixes = ['late ', 'laat ', 'laat-', 'vroege ', 'vroeg ', 'vroeg-', 'eerste helft ', '1e helft ', 'laatste helft ', 'tweede helft ', 'eerste kwart ', '1e kwart ', 'laatste kwart ', 'van ', 'het ', 'de ', '-', '(']
+probe_suffixes = ['e', 's', '-', ')', ' periode', 'e periode', 'se periode']
+
+
+# yields all entries in the ontology and variants of them, to check the rules on
+def rule_probes(ontology):
+    for key in ontology:
+        yield key # an exact key can also resolve through another rule ('laat paleolithicum a', brackets suffix)
+        yield key.replace(' ','-')
+        for prefix in probe_prefixes:
+            yield prefix + key
+            yield prefix + key + 'e'
+        for suffix in probe_suffixes:
+            yield key + suffix
+
+
+# returns {(rule name, rule name):string} for every pair of rules that both resolve the same string, but to a different daterange.
+# the order of those rules matters, first rule in the pair is first in the default order
+def find_rule_conflicts(strings):
+    conflicts = {}
+    for string in strings:
+        hits = []
+        for rule in ontology_rules:
+            key = rule_key(rule, string)
+            if key is not False and key in ontology:
+                hits.append((rule[0], rule[3](ontology[key])))
+        for i in range(len(hits)):
+            for j in range(i+1, len(hits)):
+                if hits[i][1] != hits[j][1] and (hits[i][0], hits[j][0]) not in conflicts:
+                    conflicts[(hits[i][0], hits[j][0])] = string
+    return conflicts
+
+
+# orders rule names by number of hits (most first), but a rule is never put before a rule it conflicts with that's earlier in the default order.
+# The rules a rule has to come after count as often hit as that rule, so they are moved up with it (bottom rules of the default order)
+def order_rules(counts, conflicts):
+    names = [rule[0] for rule in ontology_rules]
+    mustComeAfter = {name: set() for name in names}
+    for first, second in conflicts:
+        mustComeAfter[second].add(first)
+    
+    hits = {name: counts.get(name, 0) for name in names}
+    changed = True
+    while changed:
+        changed = False
+        for name in names:
+            for first in mustComeAfter[name]:
+                if hits[first] < hits[name]:
+                    hits[first] = hits[name]
+                    changed = True
+    
+    order = []
+    while len(order) < len(names):
+        available = [name for name in names if name not in order and mustComeAfter[name].issubset(order)]
+        order.append(max(available, key=lambda name: (hits[name], -names.index(name))))
+    return order
+
+
+# starts recording which check_ontology rules resolve strings in this thread (other threads aren't recorded and keep the current order).
+# order: list of rules to use while recording, default is the current rule order
+def start_rule_recording(order = None):
+    global rule_recording_threads
+    if getattr(rule_recording, 'counts', None) is None:
+        with rule_recording_lock:
+            rule_recording_threads += 1
+    rule_recording.counts, rule_recording.inputs = {}, []
+    rule_recording.order = order or rule_order
+
+
+# stops recording in this thread, returns (counts, inputs), see rule_recording
+def stop_rule_recording():
+    global rule_recording_threads
+    counts, inputs = rule_recording.counts, rule_recording.inputs
+    rule_recording.counts, rule_recording.inputs, rule_recording.order = None, [], None
+    with rule_recording_lock:
+        rule_recording_threads -= 1
+    return counts, inputs
+
+
+# runs detection2daterange on a sample workload (list of timeperiod strings), records which rules resolve it and checks which
+# rule pairs conflict. checkOntology: also check variants of all ontology entries. Returns profile:
+# {'counts':{'rule name':hits}, 'order':['rule name',...], 'conflicts':[['rule name','rule name','example string'],...]}
+def record_rule_profile(timeperiods, checkOntology = True):
+    start_rule_recording(ontology_rules) # record with the default order
+    try:
+        for timeperiod in timeperiods:
+            detection2daterange(timeperiod)
+    finally:
+        counts, strings = stop_rule_recording()
+    strings = set(strings)
+    
+    if checkOntology:
+        strings.update(rule_probes(ontology))
+    conflicts = find_rule_conflicts(sorted(strings))
+    
+    if debug:
+        print(counts)
+        print(conflicts)
+    
+    return {
+        'counts': counts,
+        'order': order_rules(counts, conflicts),
+        'conflicts': [[first, second, string] for (first, second), string in sorted(conflicts.items())],
+    }
+
+
+# saves rule profile as json
+def save_rule_profile(profile, location):
+    with open(location, 'w', encoding="utf-8") as json_file:
+        json.dump(profile, json_file, indent=4, ensure_ascii=False)
+
+
+# makes check_ontology use the rule order of a saved profile. The profile's conflicts are combined with a new check of the
+# current ontology (which might have changed since recording, e.g. extra PeriodO periods). Only the sample and the variants of
+# ontology entries are checked, so other strings could in theory still get a different result. check_ontology tries the rules of
+# the default order faster (written out) than the rules of a profiled order, so the profiled order is only used if the profile's
+# hits need a third fewer rules tried (see benchmarks/benchmark_rule_profile.py). Returns the order used
+def load_rule_profile(location, checkOntology = True):
+    global rule_order
+    with open(location, encoding="utf-8") as json_file:
+        profile = json.load(json_file)
+    
+    conflicts = {(first, second): string for first, second, string in profile.get('conflicts', [])}
+    if checkOntology:
+        conflicts.update(find_rule_conflicts(rule_probes(ontology)))
+    
+    order = order_rules(profile['counts'], conflicts)
+    names = [rule[0] for rule in ontology_rules]
+    hits = {name: count for name, count in profile['counts'].items() if name in names}
+    defaultTries = sum(count * (names.index(name) + 1) for name, count in hits.items())
+    profiledTries = sum(count * (order.index(name) + 1) for name, count in hits.items())
+    if profiledTries * 3 >= defaultTries * 2:
+        rule_order = ontology_rules
+        return names
+    
+    rules = {rule[0]: rule for rule in ontology_rules}
+    rule_order = [rules[name] for name in order]
+    return order
+
+
+# go back to the default rule order
+def reset_rule_order():
+    global rule_order
+    rule_order = ontology_rules
+
+
+
+# ASYNC API ---------------------------------------------------
+
+# executor the async functions below run detection2daterange on, created on first use (see asyncExecutorType and asyncMaxWorkers)
+async_executor = None
+
+# state per event loop: (asyncMaxInFlight the semaphore was made with, semaphore bounding the work in flight,
+# {(timeperiod, executor):task} of mentions currently being resolved)
+async_state = weakref.WeakKeyDictionary()
+
+
+# returns the executor for the async functions, creates a thread or process pool if there isn't one yet. Process pool workers
+# are forked, so they resolve with this process' ontology (loaded PeriodO dumps), rule order and options. Where fork isn't
+# available (Windows) they start fresh and init_async_worker gives them those. Either way it's the state at creation, call
+# close_async_executor after changing it
+def get_async_executor():
+    global async_executor
+    if async_executor is None:
+        if asyncExecutorType == 'process' and 'fork' in multiprocessing.get_all_start_methods():
+            async_executor = ProcessPoolExecutor(max_workers=asyncMaxWorkers, mp_context=multiprocessing.get_context('fork'))
+        elif asyncExecutorType == 'process':
+            state = (ontology, [rule[0] for rule in rule_order], {name: globals()[name] for name in async_worker_options})
+            async_executor = ProcessPoolExecutor(max_workers=asyncMaxWorkers, initializer=init_async_worker, initargs=state)
+        else:
+            async_executor = ThreadPoolExecutor(max_workers=asyncMaxWorkers)
+    return async_executor
+
+
+# options a process pool worker that isn't forked gets from the process that made the pool (see get_async_executor)
+async_worker_options = ['debug', 'precomputeQualifiedPeriods', 'qualifierSpanFractions']
+
+
+# runs in a process pool worker that isn't forked: replaces the ontology, rule order and options its import gave it
+def init_async_worker(workerOntology, order, options):
+    global ontology, rule_order
+    globals().update(options)
+    ontology = workerOntology
+    reindex_ontology()
+    rules = {rule[0]: rule for rule in ontology_rules}
+    rule_order = [rules[name] for name in order]
+    if rule_order == ontology_rules:
+        rule_order = ontology_rules
+
+
+# shuts down the executor created by get_async_executor, a new one is created on next use (e.g. after changing asyncExecutorType)
+def close_async_executor():
+    global async_executor
+    if async_executor is not None:
+        async_executor.shutdown()
+        async_executor = None
+
+
+# returns (semaphore, in flight dict) for the given event loop. If asyncMaxInFlight changed, new work gets a new semaphore
+# of that size (work that's already waiting or running keeps its slot in the old one)
+def get_async_state(loop):
+    if loop not in async_state:
+        async_state[loop] = (asyncMaxInFlight, asyncio.Semaphore(asyncMaxInFlight), {})
+    elif async_state[loop][0] != asyncMaxInFlight:
+        async_state[loop] = (asyncMaxInFlight, asyncio.Semaphore(asyncMaxInFlight), async_state[loop][2])
+    return async_state[loop][1:]
+
+
+# runs detection2daterange on the executor, waits for a free slot first so the amount of work in flight stays bounded
+async def resolve_on_executor(timeperiod, executor, semaphore):
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, detection2daterange, timeperiod)
+
+
+# async version of detection2daterange, doesn't block the event loop. If the same string is already being resolved on the
+# same executor, wait for that result instead of computing it again
+async def detection2daterange_async(timeperiod, executor = None):
+    semaphore, inFlight = get_async_state(asyncio.get_running_loop())
+    executor = executor or get_async_executor()
+    key = (timeperiod, executor)
+    
+    task = inFlight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(resolve_on_executor(timeperiod, executor, semaphore))
+        inFlight[key] = task
+        task.add_done_callback(lambda done: inFlight.pop(key) if inFlight.get(key) is done else None)
+    
+    # shield, so a cancelled caller doesn't cancel the computation other callers are waiting for
+    daterange = await asyncio.shield(task)
+    
+    # every caller gets its own list
+    if daterange:
+        return list(daterange)
+    return daterange
+
+
+# wraps a normal iterable so it can be used with 'async for'
+async def iterate_async(timeperiods):
+    for timeperiod in timeperiods:
+        yield timeperiod
+
+
+# takes (async) iterable of timeperiod strings, e.g. reading from a queue, yields (timeperiod,[startdate,enddate]) in input order.
+# reads at most maxInFlight mentions ahead of the one that's yielded next
+async def iter_detections2dateranges_async(timeperiods, executor = None, maxInFlight = None):
+    if maxInFlight is None:
+        maxInFlight = asyncMaxInFlight
+    if not hasattr(timeperiods, '__aiter__'):
+        timeperiods = iterate_async(timeperiods)
+    
+    pending = deque()
+    try:
+        async for timeperiod in timeperiods:
+            pending.append((timeperiod, asyncio.ensure_future(detection2daterange_async(timeperiod, executor))))
+            if len(pending) >= maxInFlight:
+                timeperiod, task = pending.popleft()
+                yield timeperiod, await task
+        
+        while pending:
+            timeperiod, task = pending.popleft()
+            yield timeperiod, await task
+    
+    # stopped early (error or consumer quit), don't leave tasks running
+    finally:
+        for timeperiod, task in pending:
+            task.cancel()
+
+
+# async version of a batch: takes list of timeperiod strings, returns list of [startdate,enddate] in the same order
+async def detections2dateranges_async(timeperiods, executor = None, maxInFlight = None):
+    return [daterange async for timeperiod, daterange in iter_detections2dateranges_async(timeperiods, executor, maxInFlight)]
+
+
+# use rule order from profile, if set
+if ruleProfileLocation:
+    load_rule_profile(ruleProfileLocation)
+
+
+# run argument, if provided from command line (not when imported by a script that has arguments of its own)
+if __name__ == "__main__" and len(sys.argv) > 1:
     print(detection2daterange(sys.argv[1]))
 
 
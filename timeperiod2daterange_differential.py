@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+
+Differential verification: replays a corpus of timeperiod strings through the reference engine (timeperiod2daterange_reference,
+the resolver before the optimisations) and the optimised engine (timeperiod2daterange.detections2dateranges), and reports every
+input where they differ, with both outputs and the rule that fired, plus the speedup per category of input.
+Can also capture a golden snapshot (input + reference output) of e.g. production traffic, to check later versions against.
+
+Usage (direct):
+    ./timeperiod2daterange_differential.py corpus.txt                        # one timeperiod per line, prints report
+    ./timeperiod2daterange_differential.py corpus.txt --capture golden.jsonl # save golden snapshot of corpus
+    ./timeperiod2daterange_differential.py --check golden.jsonl              # check optimised engine against snapshot
+
+Usage (import into another script)
+    import timeperiod2daterange_differential
+    report = timeperiod2daterange_differential.run_differential(['1200 n. Chr', 'late bronstijd'])
+    report['divergences'] # [] if both engines agree
+
+"""
+
+
+
+# LOAD LIBRARIES ---------------------------------------------------
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import timeperiod2daterange
+import timeperiod2daterange_reference
+
+
+
+# DEFINE FUNCTIONS ---------------------------------------------------
+
+# runs a list of timeperiods through an engine ('reference' or 'optimised'), returns list of [startdate,enddate]/False
+def run_engine(engine, timeperiods):
+    # the engines print errors in strings, keep those out of the report
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        if engine == 'reference':
+            return [timeperiod2daterange_reference.detection2daterange(timeperiod) for timeperiod in timeperiods]
+        return timeperiod2daterange.detections2dateranges(timeperiods)
+
+
+# runs all groups of timeperiods through an engine, returns {'category':(results, seconds)}
+def time_engine(engine, groups):
+    output = {}
+    for category, timeperiods in groups.items():
+        start = time.perf_counter()
+        results = run_engine(engine, timeperiods)
+        output[category] = (results, time.perf_counter() - start)
+    return output
+
+
+# returns the kind of input a timeperiod is, to report the speedup per category
+def input_category(timeperiod):
+    if type(timeperiod) != str:
+        return 'other'
+    if any(comboWord in timeperiod for comboWord in timeperiod2daterange.comboWords):
+        return 'multiple'
+    match = timeperiod2daterange.batch_fast_path.fullmatch(timeperiod.lower())
+    if match:
+        return match.lastgroup
+    timeperiod = timeperiod.lower()
+    if '-eeuw' in timeperiod or ' eeuw' in timeperiod or ' millennium' in timeperiod or ' millenium' in timeperiod or timeperiod2daterange.has_numeric_ordinal_strict.search(timeperiod):
+        return 'century'
+    if timeperiod2daterange.has_digits.search(timeperiod):
+        return 'digits'
+    return 'ontology'
+
+
+# returns which rule resolves timeperiod in the optimised engine: the check_ontology rules that fired, or else the input category.
+# The reference engine isn't instrumented, so which of its rules gave the reference output isn't known
+def fired_rule(timeperiod):
+    timeperiod2daterange.start_rule_recording()
+    try:
+        run_engine('optimised', [timeperiod])
+    finally:
+        counts, inputs = timeperiod2daterange.stop_rule_recording()
+    rules = sorted(counts)
+    if rules:
+        return ', '.join(rules)
+    return input_category(timeperiod)
+
+
+# compares outputs, False and [0,0] are different
+def same_output(output, output2):
+    return output == output2 and type(output) == type(output2)
+
+
+# replays corpus (list of timeperiod strings) through both engines, at the same time in 2 processes if parallel. The processes
+# are forked, so settings like a loaded PeriodO dump or rule profile carry over; where fork isn't available (Windows) the
+# engines run one after the other. Returns report:
+# {'divergences':[{'input', 'reference', 'optimised', 'rule'}], 'categories':{'category':{'count', 'reference', 'optimised', 'speedup'}}}
+def run_differential(corpus, parallel = True):
+    groups = {}
+    for timeperiod in corpus:
+        groups.setdefault(input_category(timeperiod), []).append(timeperiod)
+
+    if parallel and 'fork' not in multiprocessing.get_all_start_methods():
+        print('fork start method not available, running the engines sequentially', file=sys.stderr)
+        parallel = False
+    
+    if parallel:
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('fork')) as executor:
+            reference = executor.submit(time_engine, 'reference', groups)
+            optimised = executor.submit(time_engine, 'optimised', groups)
+            reference, optimised = reference.result(), optimised.result()
+    else:
+        reference = time_engine('reference', groups)
+        optimised = time_engine('optimised', groups)
+
+    report = {'divergences': [], 'categories': {}}
+    for category, timeperiods in groups.items():
+        referenceResults, referenceTime = reference[category]
+        optimisedResults, optimisedTime = optimised[category]
+        for timeperiod, referenceResult, optimisedResult in zip(timeperiods, referenceResults, optimisedResults):
+            if not same_output(referenceResult, optimisedResult):
+                report['divergences'].append({'input': timeperiod, 'reference': referenceResult, 'optimised': optimisedResult, 'rule': fired_rule(timeperiod)})
+        report['categories'][category] = {
+            'count': len(timeperiods),
+            'reference': referenceTime,
+            'optimised': optimisedTime,
+            'speedup': referenceTime / optimisedTime if optimisedTime else None,
+        }
+    return report
+
+
+# prints report of run_differential
+def print_report(report):
+    print('%-10s %8s %14s %14s %9s' % ('category', 'count', 'reference (s)', 'optimised (s)', 'speedup'))
+    for category, stats in sorted(report['categories'].items()):
+        speedup = '%.1fx' % stats['speedup'] if stats['speedup'] else '-'
+        print('%-10s %8d %14.3f %14.3f %9s' % (category, stats['count'], stats['reference'], stats['optimised'], speedup))
+
+    print()
+    print(str(len(report['divergences'])) + ' divergences')
+    if report['divergences']:
+        print('(rule: what resolved the input in the optimised engine, the reference engine may have used another rule)')
+    for divergence in report['divergences']:
+        print('%r: reference %s, optimised %s (rule: %s)' % (divergence['input'], divergence['reference'], divergence['optimised'], divergence['rule']))
+
+
+# saves golden snapshot of timeperiods (e.g. production traffic): json lines {'input':timeperiod, 'output':reference output}.
+# sample: fraction of the (unique) timeperiods to keep. Returns number of saved timeperiods
+def capture_golden(timeperiods, location, sample = 1.0):
+    timeperiods = list(dict.fromkeys(timeperiod for timeperiod in timeperiods if type(timeperiod) == str))
+    if sample < 1:
+        timeperiods = random.sample(timeperiods, round(len(timeperiods) * sample))
+    outputs = run_engine('reference', timeperiods)
+    with open(location, 'w', encoding="utf-8") as golden_file:
+        for timeperiod, output in zip(timeperiods, outputs):
+            golden_file.write(json.dumps({'input': timeperiod, 'output': output}, ensure_ascii=False) + '\n')
+    return len(timeperiods)
+
+
+# checks the optimised engine against a golden snapshot, returns divergences (same format as run_differential)
+def check_golden(location):
+    with open(location, encoding="utf-8") as golden_file:
+        golden = [json.loads(line) for line in golden_file if line.strip()]
+    outputs = run_engine('optimised', [entry['input'] for entry in golden])
+    divergences = []
+    for entry, output in zip(golden, outputs):
+        if not same_output(entry['output'], output):
+            divergences.append({'input': entry['input'], 'reference': entry['output'], 'optimised': output, 'rule': fired_rule(entry['input'])})
+    return divergences
+
+
+# reads corpus file, one timeperiod per line
+def read_corpus(location):
+    with open(location, encoding="utf-8") as corpus_file:
+        return [line.rstrip('\n') for line in corpus_file if line.strip()]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the optimised engine of timeperiod2daterange to the reference engine')
+    parser.add_argument('corpus', nargs='?', help='file with one timeperiod per line')
+    parser.add_argument('--capture', metavar='GOLDEN', help='save golden snapshot of the corpus to this file (json lines)')
+    parser.add_argument('--sample', type=float, default=1.0, help='fraction of the corpus to put in the golden snapshot')
+    parser.add_argument('--check', metavar='GOLDEN', help='check the optimised engine against a golden snapshot')
+    parser.add_argument('--sequential', action='store_true', help="don't run the engines in parallel")
+    args = parser.parse_args()
+
+    if args.check:
+        divergences = check_golden(args.check)
+        print_report({'divergences': divergences, 'categories': {}})
+        sys.exit(1 if divergences else 0)
+    elif args.corpus and args.capture:
+        print(str(capture_golden(read_corpus(args.corpus), args.capture, args.sample)) + ' timeperiods saved')
+    elif args.corpus:
+        report = run_differential(read_corpus(args.corpus), parallel = not args.sequential)
+        print_report(report)
+        sys.exit(1 if report['divergences'] else 0)
+    else:
+        parser.print_help()